@@ -0,0 +1,38 @@
+"""add covering transactions user/timestamp/category index
+
+Revision ID: 3c9e1f2a7b41
+Revises: 
+Create Date: 2026-10-14 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9e1f2a7b41'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_transactions_user_timestamp_category",
+        "transactions",
+        ["user_id", "timestamp", "category"],
+        postgresql_include=["amount", "is_essential"],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_transactions_user_timestamp_category",
+        table_name="transactions",
+        if_exists=True,
+    )
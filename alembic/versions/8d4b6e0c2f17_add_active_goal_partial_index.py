@@ -0,0 +1,38 @@
+"""add partial index on active goals
+
+Revision ID: 8d4b6e0c2f17
+Revises: 3c9e1f2a7b41
+Create Date: 2026-10-14 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4b6e0c2f17'
+down_revision: Union[str, Sequence[str], None] = '3c9e1f2a7b41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_goals_active_user",
+        "goals",
+        ["user_id", "id"],
+        postgresql_where=sa.text("status = 'ACTIVE'"),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_goals_active_user",
+        table_name="goals",
+        if_exists=True,
+    )
@@ -0,0 +1,102 @@
+"""Micro-batching of Groq chat completion calls across concurrent users."""
+
+import asyncio
+from typing import Any, List, Optional, Set, Tuple
+
+from app.config import settings
+
+
+class GroqBatcher:
+    """
+    Coalesce concurrent chat completion requests into parallel bursts.
+
+    A request that arrives to an empty queue is sent straight away. Under
+    load, requests wait for up to ``max_wait`` seconds or until
+    ``max_batch`` of them have arrived, then fire together. Groq's chat
+    endpoint accepts a single conversation per call, so a batch is sent
+    as concurrent requests rather than as one list prompt.
+    """
+
+    def __init__(self, max_batch: int = 8, max_wait: float = 0.02):
+        """
+        Initialize the batcher.
+
+        Args:
+            max_batch: Maximum requests dispatched together
+            max_wait: Maximum seconds a request waits for companions
+        """
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._dispatches: Set[asyncio.Task] = set()
+
+    def _ensure_worker(self) -> None:
+        """Start the queue worker on the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, client: Any, **kwargs: Any) -> Any:
+        """
+        Queue a chat completion request and wait for its response.
+
+        Args:
+            client: AsyncGroq client
+            **kwargs: Arguments for ``client.chat.completions.create``
+
+        Returns:
+            Chat completion response
+        """
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((client, kwargs, future))
+        return await future
+
+    async def _run(self) -> None:
+        """Drain the queue into batches."""
+        while True:
+            batch = [await self._queue.get()]
+
+            # A lone request goes out at once; only wait for companions under load
+            if not self._queue.empty():
+                deadline = self._loop.time() + self.max_wait
+
+                while len(batch) < self.max_batch:
+                    timeout = deadline - self._loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+            # Dispatch without awaiting so a slow batch doesn't hold up the next one
+            task = self._loop.create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch: List[Tuple[Any, dict, asyncio.Future]]) -> None:
+        """Send a batch concurrently and resolve each caller's future."""
+        results = await asyncio.gather(
+            *[client.chat.completions.create(**kwargs) for client, kwargs, _ in batch],
+            return_exceptions=True
+        )
+
+        for (_, _, future), result in zip(batch, results):
+            if future.done():  # Caller went away
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+# Global batcher instance
+groq_batcher = GroqBatcher(
+    max_batch=settings.groq_batch_max_size,
+    max_wait=settings.groq_batch_max_wait_ms / 1000
+)
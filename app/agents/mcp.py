@@ -1,20 +1,184 @@
 """MCP (Model-Context-Protocol) Agent - Observe → Reason → Act."""
 
-from typing import Dict, Any, Optional, List
-from groq import Groq
-from sqlalchemy.orm import Session
+import asyncio
+import re
+from functools import lru_cache
+from typing import Dict, Any, Optional, List, Tuple
+import orjson
+from groq import AsyncGroq
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
 from app.agents.prompts import (
     FINANCIAL_ADVISOR_SYSTEM_PROMPT,
     GOAL_SETTING_PROMPT,
     SPENDING_ANALYSIS_PROMPT,
-    BEHAVIORAL_NUDGE_PROMPT
+    BEHAVIORAL_NUDGE_PROMPT,
+    AGENT_INTENTS,
+    REPLY_TOOL
 )
 from app.agents.tools import AgentTools
+from app.agents.batching import groq_batcher
+from app.agents.semantic_cache import semantic_cache
 from app.messaging.session_manager import session_manager
 
 
+# Shared Groq client, so every agent reuses one HTTP connection pool
+_groq_client: Optional[AsyncGroq] = None
+
+# Latest pending history write per user. Each write waits for the previous
+# one, so a user's session updates never overlap or land out of order.
+_history_writes: Dict[str, asyncio.Task] = {}
+
+# Context values are quantized so small spending drift keeps the prompt identical
+CONTEXT_CURRENCY_STEP = 50  # ₹
+CONTEXT_PERCENT_STEP = 5  # %
+
+
+# Context templates
+GOAL_LINE_TEMPLATE = "- {title}: ₹{current} / ₹{target} ({pct}%)"
+BUDGET_STATUS_TEMPLATE = (
+    "\nBudget Status: {verdict} ({label})\n"
+    "Spent: ₹{spent} / ₹{budget}\n"
+    "Remaining: ₹{remaining}"
+)
+
+
+def _quantize(value: float, step: int) -> float:
+    """Round a value to the nearest multiple of step."""
+    return round(value / step) * step
+
+
+@lru_cache(maxsize=4096)
+def _format_whole(value: float) -> str:
+    """Format a number without decimals (amounts repeat across turns, so cache them)."""
+    return f"{value:.0f}"
+
+
+@lru_cache(maxsize=1024)
+def _render_context(
+    goals: Tuple[Tuple[str, float, float, float], ...],
+    budget: Optional[Tuple[str, str, float, float, float]]
+) -> str:
+    """
+    Render the LLM context from quantized goal and budget state.
+    
+    Pure and memoized: turns whose goals and budget haven't changed reuse
+    the previously rendered string.
+    
+    Args:
+        goals: (title, current, target, progress %) per active goal
+        budget: (verdict, label, spent, budget, remaining), or None without a goal
+        
+    Returns:
+        Context string
+    """
+    parts = []
+    
+    # Goals
+    if goals:
+        goals_str = "\n".join(
+            GOAL_LINE_TEMPLATE.format(
+                title=title,
+                current=_format_whole(current),
+                target=_format_whole(target),
+                pct=_format_whole(pct)
+            )
+            for title, current, target, pct in goals
+        )
+        parts.append(f"Active Goals:\n{goals_str}")
+    else:
+        parts.append("No active goals set.")
+    
+    # Budget status
+    if budget:
+        verdict, label, spent, budget_amount, remaining = budget
+        parts.append(BUDGET_STATUS_TEMPLATE.format(
+            verdict=verdict,
+            label=label,
+            spent=_format_whole(spent),
+            budget=_format_whole(budget_amount),
+            remaining=_format_whole(remaining)
+        ))
+    
+    return "\n\n".join(parts)
+
+
+# Intent keywords, highest priority first
+INTENT_KEYWORDS = [
+    ("delete_goals", ["delete goal", "remove goal", "delete my goal", "clear goal"]),
+    ("update_budget", ["budget is", "monthly budget", "set budget", "month budget", "my budget", "budget of"]),
+    ("add_transaction", ["i spent", "spent", "paid", "bought", "purchase", "cost"]),
+    ("update_progress", ["i saved", "i have", "already have", "update my goal", "update goal", "update progress"]),
+    ("set_goal", ["goal", "save", "want to buy", "planning"]),
+    ("check_status", ["status", "how am i", "progress", "doing"]),
+    ("analyze_spending", ["spent", "spending", "transactions"]),
+]
+
+INTENT_PRIORITY = {intent: rank for rank, (intent, _) in enumerate(INTENT_KEYWORDS)}
+
+# One pass over the message: the lookahead tries every position (so overlapping
+# keywords are all seen) and reports the highest-priority intent matching there.
+INTENT_RE = re.compile(
+    "(?=" + "|".join(
+        f"(?P<{intent}>{'|'.join(re.escape(word) for word in words)})"
+        for intent, words in INTENT_KEYWORDS
+    ) + ")"
+)
+
+
+async def _write_history(
+    user_id: str,
+    user_message: str,
+    response: str,
+    previous: Optional[asyncio.Task]
+) -> None:
+    """Store a turn in the session once the user's previous write has finished."""
+    if previous is not None:
+        await asyncio.wait([previous])
+    try:
+        await asyncio.to_thread(
+            session_manager.add_turn_to_history, user_id, user_message, response
+        )
+    except Exception as e:
+        print(f"❌ Error saving history for {user_id}: {e}")
+
+
+def _queue_history_write(user_id: str, user_message: str, response: str) -> None:
+    """Write a turn to the session in the background, after the user's earlier writes."""
+    task = asyncio.create_task(
+        _write_history(user_id, user_message, response, _history_writes.get(user_id))
+    )
+    _history_writes[user_id] = task
+    
+    def _forget(done: asyncio.Task) -> None:
+        if _history_writes.get(user_id) is done:
+            del _history_writes[user_id]
+    
+    task.add_done_callback(_forget)
+
+
+async def _wait_for_history(user_id: str) -> None:
+    """Wait for the user's pending history writes."""
+    task = _history_writes.get(user_id)
+    if task is not None:
+        await asyncio.wait([task])
+
+
+async def drain_history_writes() -> None:
+    """Wait for every pending history write (call on shutdown)."""
+    if _history_writes:
+        await asyncio.wait(list(_history_writes.values()))
+
+
+def get_groq_client() -> Optional[AsyncGroq]:
+    """Get or create the shared Groq client (None if GROQ_API_KEY is not set)."""
+    global _groq_client
+    if _groq_client is None and settings.groq_api_key:
+        _groq_client = AsyncGroq(api_key=settings.groq_api_key)
+    return _groq_client
+
+
 class MCPAgent:
     """
     MCP Agent orchestrates the Observe → Reason → Act cycle.
@@ -24,46 +188,53 @@ class MCPAgent:
     - Act: Execute tools and generate response
     """
     
-    def __init__(self, db: Session, user_id: str):
+    def __init__(self, db: AsyncSession, user_id: str, client: Optional[AsyncGroq] = None):
         """
         Initialize MCP agent.
         
         Args:
-            db: Database session
+            db: Async database session
             user_id: Telegram user ID
+            client: Groq client (defaults to the shared process-wide client)
         """
         self.db = db
         self.user_id = user_id
         self.tools = AgentTools(db, user_id)
         
-        # Initialize Groq client
-        if settings.groq_api_key:
-            self.client = Groq(api_key=settings.groq_api_key)
-        else:
-            self.client = None
+        # Reuse the shared Groq client
+        self.client = client or get_groq_client()
+        if self.client is None:
             print("⚠️  GROQ_API_KEY not configured - agent will use fallback responses")
     
-    def observe(self, user_message: str) -> Dict[str, Any]:
+    async def observe(self, user_message: str) -> Dict[str, Any]:
         """
         Observe: Gather all relevant context.
         
+        Session lookups (Redis) run in worker threads alongside the single
+        database statement for goals and spending. The database transaction
+        is closed before returning.
+        
         Args:
             user_message: User's message
             
         Returns:
             Context dictionary
         """
-        # Get conversation history
-        history = session_manager.get_history(self.user_id, limit=5)
-        
-        # Get active goals
-        goals = self.tools.get_active_goals()
-        
-        # Get spending status
-        budget_status = self.tools.check_budget_status()
-        
-        # Get conversation state
-        state = session_manager.get_conversation_state(self.user_id)
+        # Read history only after this user's previous turn has been stored
+        await _wait_for_history(self.user_id)
+        
+        history, state, (goals, budget_status) = await asyncio.gather(
+            # Get conversation history
+            asyncio.to_thread(session_manager.get_history, self.user_id, 5),
+            # Get conversation state
+            asyncio.to_thread(session_manager.get_conversation_state, self.user_id),
+            # Get active goals and spending status (one SQL statement)
+            self.tools.get_goals_overview()
+        )
+        
+        # End the read transaction so the connection goes back to the pool
+        # for the LLM round-trip instead of idling in transaction
+        await self.db.commit()
         
         return {
             "user_message": user_message,
@@ -73,7 +244,7 @@ class MCPAgent:
             "conversation_state": state
         }
     
-    def reason(self, context: Dict[str, Any]) -> Dict[str, Any]:
+    async def reason(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """
         Reason: Use LLM to understand intent and plan response.
         
@@ -86,56 +257,77 @@ class MCPAgent:
         if not self.client:
             return self._fallback_reasoning(context)
         
-        # Build messages for LLM
+        context_str = self._format_context(context)
+        
+        # Serve near-duplicate messages from the semantic cache
+        embedding = None
+        if semantic_cache.enabled:
+            try:
+                # Embedding is CPU-bound (and loads the model on first use), so keep it off the loop
+                embedding = await asyncio.to_thread(semantic_cache.embed, context["user_message"])
+                cached = semantic_cache.lookup(self.user_id, context_str, context["history"], embedding)
+                if cached:
+                    return cached
+            except Exception as e:
+                # A broken cache must never cost the user their reply; treat it as a miss
+                print(f"⚠️  Semantic cache unavailable: {e}")
+                embedding = None
+        
+        # Build messages for LLM. The static system prompt and history form a
+        # stable prefix for Groq's prompt caching; the per-turn context goes last.
         messages = [
             {"role": "system", "content": FINANCIAL_ADVISOR_SYSTEM_PROMPT}
         ]
         
-        # Add conversation history
+        # Add conversation history (long messages trimmed to keep input tokens small)
         for msg in context["history"]:
             messages.append({
                 "role": msg["role"],
-                "content": msg["content"]
+                "content": msg["content"][:settings.history_message_max_chars]
             })
         
-        # Add current context as system message
-        context_str = self._format_context(context)
-        messages.append({
-            "role": "system",
-            "content": f"Current context:\n{context_str}"
-        })
-        
-        # Add user message
+        # Add user message, prefixed with the current context
         messages.append({
             "role": "user",
-            "content": context["user_message"]
+            "content": f"<context>\n{context_str}\n</context>\n\n{context['user_message']}"
         })
         
         try:
-            # Call Groq LLM
-            response = self.client.chat.completions.create(
+            # Call Groq LLM (coalesced with other users' concurrent requests)
+            response = await groq_batcher.submit(
+                self.client,
                 model=settings.groq_model,
                 messages=messages,
+                tools=[REPLY_TOOL],
+                tool_choice={"type": "function", "function": {"name": "reply"}},
                 temperature=0.7,
                 max_tokens=500
             )
             
-            assistant_message = response.choices[0].message.content
+            self._log_prompt_cache_usage(response)
             
-            # Detect intent from response
-            intent = self._detect_intent(context["user_message"], assistant_message)
+            intent, assistant_message = self._parse_reply(
+                response.choices[0].message, context["user_message"]
+            )
+            if not assistant_message:
+                return self._fallback_reasoning(context)
             
-            return {
+            result = {
                 "intent": intent,
                 "response": assistant_message,
                 "actions": []  # Actions will be determined based on intent
             }
+            
+            if embedding is not None:
+                semantic_cache.store(self.user_id, context_str, context["history"], embedding, result)
+            
+            return result
         
         except Exception as e:
             print(f"❌ Groq API error: {e}")
             return self._fallback_reasoning(context)
     
-    def act(self, reasoning: Dict[str, Any], context: Dict[str, Any]) -> str:
+    async def act(self, reasoning: Dict[str, Any], context: Dict[str, Any]) -> str:
         """
         Act: Execute actions and return final response.
         
@@ -160,7 +352,7 @@ class MCPAgent:
                 try:
                     print(f"💾 Creating goal: {goal_params}")
                     # Create the goal
-                    goal_result = self.tools.set_saving_goal(
+                    goal_result = await self.tools.set_saving_goal(
                         title=goal_params["title"],
                         target_amount=goal_params["target_amount"],
                         deadline_days=goal_params.get("deadline_days"),
@@ -183,7 +375,7 @@ class MCPAgent:
             if progress_amount:
                 try:
                     print(f"💰 Updating goal progress: {progress_amount}")
-                    result = self.tools.update_goal_progress(amount=progress_amount)
+                    result = await self.tools.update_goal_progress(amount=progress_amount)
                     if "error" not in result:
                         print(f"✅ Goal updated: {result}")
                         response += f"\n\n✅ Updated! You now have ₹{result['current_amount']:,.0f} saved ({result['progress_percentage']:.0f}% of your goal)."
@@ -196,7 +388,7 @@ class MCPAgent:
             if budget_amount:
                 try:
                     print(f"💵 Updating budget: {budget_amount}")
-                    result = self.tools.update_budget(budget_amount)
+                    result = await self.tools.update_budget(budget_amount)
                     if "error" not in result:
                         print(f"✅ Budget updated: {result}")
                         response += f"\n\n✅ Budget updated! Your monthly non-essential budget is now ₹{budget_amount:,.0f}."
@@ -207,7 +399,7 @@ class MCPAgent:
             # Delete goals
             try:
                 print(f"🗑️  Deleting goals...")
-                result = self.tools.delete_goals()
+                result = await self.tools.delete_goals()
                 if "error" not in result:
                     print(f"✅ Deleted: {result}")
                     response += f"\n\n✅ Deleted {result['deleted']} goal(s). You can start fresh with new goals!"
@@ -224,7 +416,7 @@ class MCPAgent:
             if transaction_data:
                 try:
                     print(f"💳 Adding transaction: {transaction_data}")
-                    result = self.tools.add_transaction(
+                    result = await self.tools.add_transaction(
                         amount=transaction_data['amount'],
                         merchant=transaction_data.get('merchant', 'Unknown'),
                         category=transaction_data.get('category', 'other')
@@ -238,13 +430,12 @@ class MCPAgent:
             # Spending is already analyzed in observe(), just use it
             pass
         
-        # Store conversation in history
-        session_manager.add_to_history(self.user_id, "user", context["user_message"])
-        session_manager.add_to_history(self.user_id, "assistant", response)
+        # Store conversation in history without holding up the reply
+        _queue_history_write(self.user_id, user_message, response)
         
         return response
     
-    def process_message(self, user_message: str) -> str:
+    async def process_message(self, user_message: str) -> str:
         """
         Main entry point: Process a user message through the MCP cycle.
         
@@ -255,62 +446,91 @@ class MCPAgent:
             Agent's response
         """
         # Observe
-        context = self.observe(user_message)
+        context = await self.observe(user_message)
         
         # Reason
-        reasoning = self.reason(context)
+        reasoning = await self.reason(context)
         
         # Act
-        response = self.act(reasoning, context)
+        response = await self.act(reasoning, context)
         
         return response
     
     def _format_context(self, context: Dict[str, Any]) -> str:
-        """Format context for LLM."""
-        parts = []
-        
-        # Goals
-        if context["goals"]:
-            goals_str = "\n".join([
-                f"- {g['title']}: ₹{g['current_amount']:.0f} / ₹{g['target_amount']:.0f} ({g['progress_percentage']:.0f}%)"
-                for g in context["goals"]
-            ])
-            parts.append(f"Active Goals:\n{goals_str}")
-        else:
-            parts.append("No active goals set.")
+        """Format context for LLM (amounts rounded to ₹50, percentages to 5%)."""
+        goals = tuple(
+            (
+                g["title"],
+                _quantize(g["current_amount"], CONTEXT_CURRENCY_STEP),
+                g["target_amount"],
+                _quantize(g["progress_percentage"], CONTEXT_PERCENT_STEP)
+            )
+            for g in context["goals"]
+        )
         
-        # Budget status
         budget = context["budget_status"]
+        budget_state = None
         if budget["verdict"] != "NO_GOAL":
-            parts.append(
-                f"\nBudget Status: {budget['verdict']} ({budget['label']})\n"
-                f"Spent: ₹{budget['total_spent']:.0f} / ₹{budget['budget']:.0f}\n"
-                f"Remaining: ₹{budget['remaining']:.0f}"
+            budget_state = (
+                budget["verdict"],
+                budget["label"],
+                _quantize(budget["total_spent"], CONTEXT_CURRENCY_STEP),
+                budget["budget"],
+                _quantize(budget["remaining"], CONTEXT_CURRENCY_STEP)
             )
         
-        return "\n\n".join(parts)
+        return _render_context(goals, budget_state)
+    
+    def _log_prompt_cache_usage(self, response: Any) -> None:
+        """Log how many prompt tokens Groq served from its prefix cache."""
+        if not settings.debug:
+            return
+        
+        usage = getattr(response, "usage", None)
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", None)
+        if cached_tokens is not None:
+            print(f"🧠 Groq prompt cache: {cached_tokens}/{usage.prompt_tokens} prompt tokens cached")
+    
+    def _parse_reply(self, message: Any, user_message: str) -> Tuple[str, Optional[str]]:
+        """
+        Read intent and reply text from the model's reply tool call.
+        
+        Falls back to keyword intent detection if the model answered in
+        plain text or returned an intent outside the schema; a valid reply
+        message from the tool call is kept either way.
+        
+        Args:
+            message: Assistant message from the chat completion
+            user_message: User's message
+            
+        Returns:
+            Tuple of (intent, reply text or None)
+        """
+        if message.tool_calls:
+            try:
+                args = orjson.loads(message.tool_calls[0].function.arguments)
+                intent = args.get("intent")
+                text = args.get("message")
+                if isinstance(text, str) and text:
+                    if intent not in AGENT_INTENTS:
+                        intent = self._detect_intent(user_message, text)
+                    return intent, text
+            except (orjson.JSONDecodeError, AttributeError):
+                print("⚠️  Could not parse reply tool call, using keyword intent detection")
+        
+        text = message.content
+        return self._detect_intent(user_message, text or ""), text
     
     def _detect_intent(self, user_message: str, assistant_response: str) -> str:
         """Detect user intent from message and response."""
         user_lower = user_message.lower()
         
         # Simple keyword-based intent detection
-        if any(word in user_lower for word in ["delete goal", "remove goal", "delete my goal", "clear goal"]):
-            return "delete_goals"
-        elif any(word in user_lower for word in ["budget is", "monthly budget", "set budget", "month budget", "my budget", "budget of"]):
-            return "update_budget"
-        elif any(word in user_lower for word in ["i spent", "spent", "paid", "bought", "purchase", "cost"]):
-            return "add_transaction"
-        elif any(word in user_lower for word in ["i saved", "i have", "already have", "update my goal", "update goal", "update progress"]):
-            return "update_progress"
-        elif any(word in user_lower for word in ["goal", "save", "want to buy", "planning"]):
-            return "set_goal"
-        elif any(word in user_lower for word in ["status", "how am i", "progress", "doing"]):
-            return "check_status"
-        elif any(word in user_lower for word in ["spent", "spending", "transactions"]):
-            return "analyze_spending"
-        else:
+        intents = {m.lastgroup for m in INTENT_RE.finditer(user_lower)}
+        if not intents:
             return "general_chat"
+        return min(intents, key=INTENT_PRIORITY.__getitem__)
     
     def _fallback_reasoning(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Fallback reasoning when Groq is not available."""
@@ -116,3 +116,48 @@ Examples:
 
 "Your friend suggested an expensive plan? Counter with: 'Let's do chai instead - I'm saving for something big!' They'll respect it. ☕"
 """
+
+# Intents the agent can act on (see MCPAgent.act)
+AGENT_INTENTS = [
+    "set_goal",
+    "update_progress",
+    "update_budget",
+    "delete_goals",
+    "add_transaction",
+    "check_status",
+    "analyze_spending",
+    "general_chat",
+]
+
+# Structured reply: the model returns its message and the user's intent together
+REPLY_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "reply",
+        "description": "Send your reply to the user and classify what the user asked for.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "intent": {
+                    "type": "string",
+                    "enum": AGENT_INTENTS,
+                    "description": (
+                        "set_goal: user wants to save for or buy something; "
+                        "update_progress: user reports how much they have saved; "
+                        "update_budget: user sets their monthly non-essential budget; "
+                        "delete_goals: user wants to remove their goals; "
+                        "add_transaction: user reports money they spent; "
+                        "check_status: user asks how they are doing; "
+                        "analyze_spending: user asks about their spending; "
+                        "general_chat: anything else"
+                    )
+                },
+                "message": {
+                    "type": "string",
+                    "description": "Your reply to the user"
+                }
+            },
+            "required": ["intent", "message"]
+        }
+    }
+}
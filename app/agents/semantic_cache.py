@@ -0,0 +1,289 @@
+"""Semantic response cache for the MCP agent."""
+
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+
+from app.config import settings
+
+# Optional dependencies: either embedding backend enables the cache
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+try:
+    import onnxruntime as ort
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    from optimum.onnxruntime import ORTModelForFeatureExtraction
+    from transformers import AutoTokenizer
+except ImportError:
+    ort = None
+
+
+# Intents whose replies depend on a write performed in act(); never served from cache
+NO_CACHE_INTENTS = frozenset({
+    "set_goal",
+    "update_progress",
+    "update_budget",
+    "delete_goals",
+    "add_transaction",
+})
+
+# Upper bound on cached replies kept per user
+MAX_ENTRIES_PER_USER = 50
+
+# Upper bound on users with cached replies (least recently stored evicted first)
+MAX_CACHED_USERS = 1000
+
+
+class _OnnxEmbedder:
+    """
+    Sentence embedder served from an int8-quantized ONNX export.
+
+    The model is exported and quantized once into the embedding cache
+    directory; later starts load the quantized file directly.
+    """
+
+    def __init__(self, model_name: str, cache_dir: str):
+        """
+        Export (if needed) and load the quantized model.
+
+        Args:
+            model_name: Hugging Face model ID
+            cache_dir: Directory for the exported model files
+        """
+        export_dir = Path(cache_dir) / model_name.replace("/", "__")
+        quantized_path = export_dir / "model_quantized.onnx"
+
+        if not quantized_path.exists():
+            print(f"📦 Exporting {model_name} to ONNX (int8)...")
+            ORTModelForFeatureExtraction.from_pretrained(model_name, export=True).save_pretrained(export_dir)
+            AutoTokenizer.from_pretrained(model_name).save_pretrained(export_dir)
+            quantize_dynamic(
+                export_dir / "model.onnx",
+                quantized_path,
+                weight_type=QuantType.QInt8
+            )
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self.session = ort.InferenceSession(
+            str(quantized_path), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(export_dir)
+
+        # Warm up so the first real query doesn't pay for allocation
+        self.encode("warmup")
+
+    def encode(self, text: str):
+        """Embed text with mean pooling and L2 normalization."""
+        encoded = self.tokenizer(text, truncation=True, max_length=256, return_tensors="np")
+        inputs = {
+            name: value.astype(np.int64)
+            for name, value in encoded.items()
+            if name in self.input_names
+        }
+        token_embeddings = self.session.run(None, inputs)[0][0]
+
+        mask = encoded["attention_mask"][0][:, None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=0) / max(mask.sum(), 1e-9)
+        return pooled / np.linalg.norm(pooled)
+
+
+class SemanticCache:
+    """
+    Cache LLM reasoning results keyed by an embedding of the user message.
+
+    Entries are namespaced per user and per context fingerprint, so a cached
+    reply is only reused while the user's goals and budget, and the assistant's
+    previous message, still look the same as when it was generated.
+    """
+
+    def __init__(self):
+        """Initialize the cache (the embedding model is loaded on first use)."""
+        self.threshold = settings.semantic_cache_threshold
+        self.ttl = settings.semantic_cache_ttl
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._entries: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+
+        self.backend = self._select_backend() if settings.semantic_cache_enabled else None
+        self.enabled = self.backend is not None
+
+    def _select_backend(self) -> Optional[str]:
+        """Pick the configured embedding backend, falling back if it isn't installed."""
+        if settings.embedding_backend == "onnx":
+            if ort is not None:
+                return "onnx"
+            print("⚠️  onnxruntime/optimum not installed - using sentence-transformers embeddings")
+
+        if SentenceTransformer is not None:
+            return "sentence-transformers"
+
+        print("⚠️  No embedding backend installed - semantic cache disabled")
+        return None
+
+    def _get_model(self):
+        """
+        Load the embedding model once per process.
+
+        Loading is serialized so concurrent first calls don't export into the
+        same directory. A failed load disables the cache instead of retrying
+        the download and export on every message.
+        """
+        if self._model is not None:
+            return self._model
+
+        with self._model_lock:
+            if self._model is None:
+                if not self.enabled:
+                    raise RuntimeError("Semantic cache disabled after a failed model load")
+                try:
+                    if self.backend == "onnx":
+                        self._model = _OnnxEmbedder(settings.embedding_model, settings.embedding_cache_dir)
+                    else:
+                        self._model = SentenceTransformer(settings.embedding_model)
+                except Exception:
+                    self.enabled = False
+                    print("⚠️  Embedding model failed to load - semantic cache disabled")
+                    raise
+        return self._model
+
+    def warm_up(self) -> None:
+        """Load the embedding model ahead of the first lookup (no-op when disabled)."""
+        if self.enabled:
+            self._get_model()
+
+    def _context_key(self, context_str: str, history: List[Dict[str, str]]) -> str:
+        """
+        Fingerprint the formatted context and the assistant's last message.
+
+        Short follow-ups ("yes", "how much?") only make sense against the
+        previous turn, so the same message after a different reply must miss.
+        """
+        last_reply = next(
+            (m["content"] for m in reversed(history) if m["role"] == "assistant"), ""
+        )
+        digest = hashlib.sha1(context_str.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(last_reply.encode("utf-8"))
+        return digest.hexdigest()
+
+    def embed(self, text: str):
+        """
+        Embed a message.
+
+        Args:
+            text: Message text
+
+        Returns:
+            L2-normalized embedding vector
+        """
+        model = self._get_model()
+        if self.backend == "onnx":
+            return model.encode(text)
+        return model.encode(text, normalize_embeddings=True)
+
+    def lookup(
+        self,
+        user_id: str,
+        context_str: str,
+        history: List[Dict[str, str]],
+        embedding
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached reasoning result for a similar message.
+
+        Args:
+            user_id: Telegram user ID
+            context_str: Formatted context the reply was generated against
+            history: Conversation history the reply was generated after
+            embedding: Embedding of the current user message
+
+        Returns:
+            Cached reasoning result or None on miss
+        """
+        if user_id not in self._entries:
+            return None
+
+        now = time.time()
+        entries = [e for e in self._entries[user_id] if e["expires_at"] > now]
+        if not entries:
+            del self._entries[user_id]
+            return None
+        self._entries[user_id] = entries
+
+        context_key = self._context_key(context_str, history)
+        candidates = [e for e in entries if e["context_key"] == context_key]
+        if not candidates:
+            return None
+
+        # Vectors are normalized, so the dot product is the cosine similarity
+        scores = np.stack([e["embedding"] for e in candidates]) @ embedding
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+
+        return copy.deepcopy(candidates[best]["result"])
+
+    def store(
+        self,
+        user_id: str,
+        context_str: str,
+        history: List[Dict[str, str]],
+        embedding,
+        result: Dict[str, Any]
+    ) -> None:
+        """
+        Store a reasoning result.
+
+        Args:
+            user_id: Telegram user ID
+            context_str: Formatted context the reply was generated against
+            history: Conversation history the reply was generated after
+            embedding: Embedding of the user message
+            result: Reasoning result (intent, response, actions)
+        """
+        if result["intent"] in NO_CACHE_INTENTS:
+            return
+
+        entries = self._entries.setdefault(user_id, [])
+        self._entries.move_to_end(user_id)
+        entries.append({
+            "context_key": self._context_key(context_str, history),
+            "embedding": embedding,
+            "result": copy.deepcopy(result),
+            "expires_at": time.time() + self.ttl,
+        })
+
+        if len(entries) > MAX_ENTRIES_PER_USER:
+            del entries[:-MAX_ENTRIES_PER_USER]
+
+        while len(self._entries) > MAX_CACHED_USERS:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        """
+        Drop all cached replies for a user (call after any state change).
+
+        Args:
+            user_id: Telegram user ID
+        """
+        self._entries.pop(user_id, None)
+
+
+# Global semantic cache instance
+semantic_cache = SemanticCache()
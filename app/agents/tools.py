@@ -1,39 +1,174 @@
 """Tool definitions for the MCP agent."""
 
-from typing import Dict, Any, List, Optional
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple, Union
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from sqlalchemy import select, delete, func, case, JSON
+from sqlalchemy.dialects.postgresql import insert, aggregate_order_by
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import User, Goal, Transaction, GoalStatus, TransactionCategory
 from app.config import settings
+from app.utils import current_month_start
+from app.agents.semantic_cache import semantic_cache
+
+
+# Sentinel for "active goal not looked up yet" (None means "no active goal")
+_UNSET: Any = object()
+
+# Telegram ID -> users.id, shared by all AgentTools instances in the process
+USER_PK_CACHE_SIZE = 10_000
+_user_pk_cache: "OrderedDict[str, int]" = OrderedDict()
+
+
+# Columns read for active goal listings; progress is computed by the database
+ACTIVE_GOAL_COLUMNS = (
+    Goal.id,
+    Goal.title,
+    Goal.target_amount,
+    Goal.current_amount,
+    case(
+        (Goal.target_amount == 0, 0.0),
+        else_=func.coalesce(Goal.current_amount, 0.0) / Goal.target_amount * 100
+    ).label("progress_percentage"),
+    Goal.deadline,
+    Goal.month_nonessential_budget,
+)
+
+
+def forget_user(telegram_id: str) -> None:
+    """
+    Drop a cached user primary key (call after deleting the user row).
+    
+    Args:
+        telegram_id: Telegram user ID
+    """
+    _user_pk_cache.pop(telegram_id, None)
 
 
 class AgentTools:
     """Tools that the MCP agent can use to interact with the system."""
     
-    def __init__(self, db: Session, user_id: str):
+    def __init__(self, db: AsyncSession, user_id: str):
         """
         Initialize agent tools.
         
         Args:
-            db: Database session
+            db: Async database session
             user_id: Telegram user ID
         """
         self.db = db
         self.user_id = user_id
-        self.user = self._get_or_create_user()
     
-    def _get_or_create_user(self) -> User:
-        """Get or create user in database."""
-        user = self.db.query(User).filter(User.telegram_id == self.user_id).first()
-        if not user:
-            user = User(telegram_id=self.user_id)
-            self.db.add(user)
-            self.db.commit()
-            self.db.refresh(user)
-        return user
+    async def _get_user_pk(self) -> int:
+        """Get or create the user in database and return its primary key."""
+        user_pk = _user_pk_cache.get(self.user_id)
+        if user_pk is not None:
+            _user_pk_cache.move_to_end(self.user_id)
+            return user_pk
+        
+        result = await self.db.execute(
+            select(User.id).where(User.telegram_id == self.user_id)
+        )
+        user_pk = result.scalar_one_or_none()
+        if user_pk is None:
+            # Concurrent first messages may both get here; only one insert wins
+            result = await self.db.execute(
+                insert(User)
+                .values(telegram_id=self.user_id)
+                .on_conflict_do_nothing(index_elements=[User.telegram_id])
+                .returning(User.id)
+            )
+            user_pk = result.scalar_one_or_none()
+            await self.db.commit()
+            if user_pk is None:
+                result = await self.db.execute(
+                    select(User.id).where(User.telegram_id == self.user_id)
+                )
+                user_pk = result.scalar_one()
+        
+        _user_pk_cache[self.user_id] = user_pk
+        if len(_user_pk_cache) > USER_PK_CACHE_SIZE:
+            _user_pk_cache.popitem(last=False)
+        return user_pk
+    
+    async def _get_goal(self, goal_id: Optional[int] = None) -> Optional[Goal]:
+        """
+        Get a goal by ID, or the first active goal when no ID is given.
+        
+        Args:
+            goal_id: Specific goal ID (optional)
+            
+        Returns:
+            Goal or None
+        """
+        user_pk = await self._get_user_pk()
+        
+        if goal_id:
+            result = await self.db.execute(
+                select(Goal).where(
+                    Goal.id == goal_id,
+                    Goal.user_id == user_pk
+                )
+            )
+            return result.scalar_one_or_none()
+        
+        result = await self.db.execute(
+            select(Goal).where(
+                Goal.user_id == user_pk,
+                Goal.status == GoalStatus.ACTIVE
+            ).order_by(Goal.id).limit(1)
+        )
+        return result.scalar_one_or_none()
+    
+    async def _get_active_goal_rows(self) -> List[Row]:
+        """
+        Get all active goals for the user, oldest first.
+        
+        Returns plain column rows rather than ORM objects: the listing is
+        read-only, so there is no need to hydrate and track Goal instances.
+        Rows expose the same attribute names (plus progress_percentage).
+        """
+        user_pk = await self._get_user_pk()
+        result = await self.db.execute(
+            self._active_goals_query(user_pk).order_by(Goal.id)
+        )
+        return list(result.all())
+    
+    def _active_goals_query(self, user_pk: int):
+        """Select ACTIVE_GOAL_COLUMNS for the user's active goals."""
+        return select(*ACTIVE_GOAL_COLUMNS).where(
+            Goal.user_id == user_pk,
+            Goal.status == GoalStatus.ACTIVE
+        )
+    
+    def _monthly_spend_query(self, user_pk: int):
+        """Select this month's spend totals grouped by category and essential flag."""
+        is_essential = func.coalesce(Transaction.is_essential, False)
+        return select(
+            Transaction.category,
+            is_essential.label("is_essential"),
+            func.sum(Transaction.amount).label("total"),
+            func.count(Transaction.id).label("count")
+        ).where(
+            Transaction.user_id == user_pk,
+            Transaction.timestamp >= current_month_start()
+        ).group_by(Transaction.category, is_essential)
     
-    def set_saving_goal(
+    def _goal_to_dict(self, goal: Row) -> Dict[str, Any]:
+        """Serialize an active goal row."""
+        return {
+            "goal_id": goal.id,
+            "title": goal.title,
+            "target_amount": goal.target_amount,
+            "current_amount": goal.current_amount,
+            "progress_percentage": goal.progress_percentage,
+            "deadline": goal.deadline.isoformat() if goal.deadline else None,
+            "month_nonessential_budget": goal.month_nonessential_budget
+        }
+    
+    async def set_saving_goal(
         self,
         title: str,
         target_amount: float,
@@ -52,12 +187,14 @@ class AgentTools:
         Returns:
             Goal information dictionary
         """
+        user_pk = await self._get_user_pk()
+        
         deadline = None
         if deadline_days:
             deadline = datetime.utcnow() + timedelta(days=deadline_days)
         
         goal = Goal(
-            user_id=self.user.id,
+            user_id=user_pk,
             title=title,
             target_amount=target_amount,
             deadline=deadline,
@@ -66,8 +203,9 @@ class AgentTools:
         )
         
         self.db.add(goal)
-        self.db.commit()
-        self.db.refresh(goal)
+        await self.db.commit()
+        semantic_cache.invalidate(self.user_id)
+        await self.db.refresh(goal)
         
         return {
             "goal_id": goal.id,
@@ -77,32 +215,65 @@ class AgentTools:
             "status": goal.status.value
         }
     
-    def get_active_goals(self) -> List[Dict[str, Any]]:
+    async def get_active_goals(self) -> List[Dict[str, Any]]:
         """
         Get all active goals for the user.
         
         Returns:
             List of goal dictionaries
         """
-        goals = self.db.query(Goal).filter(
-            Goal.user_id == self.user.id,
-            Goal.status == GoalStatus.ACTIVE
-        ).all()
+        goals = await self._get_active_goal_rows()
+        return [self._goal_to_dict(g) for g in goals]
+    
+    async def get_goals_overview(self) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Get active goals and budget status with a single SQL statement.
         
-        return [
-            {
-                "goal_id": g.id,
-                "title": g.title,
-                "target_amount": g.target_amount,
-                "current_amount": g.current_amount,
-                "progress_percentage": g.progress_percentage,
-                "deadline": g.deadline.isoformat() if g.deadline else None,
-                "month_nonessential_budget": g.month_nonessential_budget
-            }
-            for g in goals
+        The active goal and monthly spend queries become CTEs, and each is
+        aggregated to one JSON value, so one round-trip returns both.
+        
+        Returns:
+            Tuple of (active goal dictionaries, budget status dictionary)
+        """
+        user_pk = await self._get_user_pk()
+        goals_cte = self._active_goals_query(user_pk).cte("g")
+        spend_cte = self._monthly_spend_query(user_pk).cte("s")
+        
+        result = await self.db.execute(select(
+            select(func.json_agg(
+                aggregate_order_by(func.row_to_json(goals_cte.table_valued()), goals_cte.c.id),
+                type_=JSON
+            )).scalar_subquery().label("goals"),
+            select(func.json_agg(
+                func.row_to_json(spend_cte.table_valued()),
+                type_=JSON
+            )).scalar_subquery().label("spend"),
+        ))
+        row = result.one()
+        
+        # Same keys as _goal_to_dict(); JSON already renders deadlines as ISO strings
+        goals = [
+            {("goal_id" if key == "id" else key): value for key, value in goal.items()}
+            for goal in row.goals or []
         ]
+        if not goals:
+            return [], {
+                "verdict": "NO_GOAL",
+                "message": "No active goal set"
+            }
+        
+        active_goal = goals[0]
+        # row_to_json gives the stored enum name, not the enum value
+        spending = self._summarize_spending(
+            (
+                (TransactionCategory[s["category"]].value, s["is_essential"], s["total"], s["count"])
+                for s in row.spend or []
+            ),
+            active_goal["month_nonessential_budget"]
+        )
+        return goals, self._budget_status(active_goal, spending)
     
-    def update_goal_progress(
+    async def update_goal_progress(
         self,
         goal_id: Optional[int] = None,
         amount: Optional[float] = None,
@@ -119,18 +290,7 @@ class AgentTools:
         Returns:
             Updated goal information
         """
-        # Get the goal
-        if goal_id:
-            goal = self.db.query(Goal).filter(
-                Goal.id == goal_id,
-                Goal.user_id == self.user.id
-            ).first()
-        else:
-            # Get first active goal
-            goal = self.db.query(Goal).filter(
-                Goal.user_id == self.user.id,
-                Goal.status == GoalStatus.ACTIVE
-            ).first()
+        goal = await self._get_goal(goal_id)
         
         if not goal:
             return {"error": "No goal found"}
@@ -145,8 +305,9 @@ class AgentTools:
         if goal.current_amount >= goal.target_amount:
             goal.status = GoalStatus.COMPLETED
         
-        self.db.commit()
-        self.db.refresh(goal)
+        await self.db.commit()
+        semantic_cache.invalidate(self.user_id)
+        await self.db.refresh(goal)
         
         return {
             "goal_id": goal.id,
@@ -157,7 +318,7 @@ class AgentTools:
             "status": goal.status.value
         }
     
-    def update_budget(self, budget_amount: float, goal_id: Optional[int] = None) -> Dict[str, Any]:
+    async def update_budget(self, budget_amount: float, goal_id: Optional[int] = None) -> Dict[str, Any]:
         """
         Update monthly non-essential budget for a goal.
         
@@ -168,18 +329,7 @@ class AgentTools:
         Returns:
             Updated goal information
         """
-        # Get the goal
-        if goal_id:
-            goal = self.db.query(Goal).filter(
-                Goal.id == goal_id,
-                Goal.user_id == self.user.id
-            ).first()
-        else:
-            # Get first active goal
-            goal = self.db.query(Goal).filter(
-                Goal.user_id == self.user.id,
-                Goal.status == GoalStatus.ACTIVE
-            ).first()
+        goal = await self._get_goal(goal_id)
         
         if not goal:
             return {"error": "No goal found"}
@@ -187,8 +337,9 @@ class AgentTools:
         # Update budget
         goal.month_nonessential_budget = budget_amount
         
-        self.db.commit()
-        self.db.refresh(goal)
+        await self.db.commit()
+        semantic_cache.invalidate(self.user_id)
+        await self.db.refresh(goal)
         
         return {
             "goal_id": goal.id,
@@ -196,7 +347,7 @@ class AgentTools:
             "month_nonessential_budget": goal.month_nonessential_budget
         }
     
-    def delete_goals(self, goal_id: Optional[int] = None) -> Dict[str, Any]:
+    async def delete_goals(self, goal_id: Optional[int] = None) -> Dict[str, Any]:
         """
         Delete goals for the user.
         
@@ -206,18 +357,18 @@ class AgentTools:
         Returns:
             Result dictionary
         """
+        user_pk = await self._get_user_pk()
+        
         if goal_id:
             # Delete specific goal
-            goal = self.db.query(Goal).filter(
-                Goal.id == goal_id,
-                Goal.user_id == self.user.id
-            ).first()
+            goal = await self._get_goal(goal_id)
             
             if not goal:
                 return {"error": "Goal not found"}
             
-            self.db.delete(goal)
-            self.db.commit()
+            await self.db.delete(goal)
+            await self.db.commit()
+            semantic_cache.invalidate(self.user_id)
             
             return {
                 "deleted": 1,
@@ -225,19 +376,23 @@ class AgentTools:
             }
         else:
             # Delete all active goals
-            deleted_count = self.db.query(Goal).filter(
-                Goal.user_id == self.user.id,
-                Goal.status == GoalStatus.ACTIVE
-            ).delete()
+            result = await self.db.execute(
+                delete(Goal).where(
+                    Goal.user_id == user_pk,
+                    Goal.status == GoalStatus.ACTIVE
+                )
+            )
+            deleted_count = result.rowcount
             
-            self.db.commit()
+            await self.db.commit()
+            semantic_cache.invalidate(self.user_id)
             
             return {
                 "deleted": deleted_count,
                 "message": f"Deleted {deleted_count} goal(s)"
             }
     
-    def add_transaction(
+    async def add_transaction(
         self,
         amount: float,
         merchant: str,
@@ -256,6 +411,8 @@ class AgentTools:
         Returns:
             Created transaction details
         """
+        user_pk = await self._get_user_pk()
+        
         # Map category string to enum
         try:
             cat_enum = TransactionCategory(category.lower())
@@ -263,7 +420,7 @@ class AgentTools:
             cat_enum = TransactionCategory.OTHER
             
         transaction = Transaction(
-            user_id=self.user.id,
+            user_id=user_pk,
             amount=amount,
             merchant=merchant,
             category=cat_enum,
@@ -272,8 +429,9 @@ class AgentTools:
         )
         
         self.db.add(transaction)
-        self.db.commit()
-        self.db.refresh(transaction)
+        await self.db.commit()
+        semantic_cache.invalidate(self.user_id)
+        await self.db.refresh(transaction)
         
         return {
             "transaction_id": transaction.id,
@@ -283,7 +441,7 @@ class AgentTools:
             "timestamp": transaction.timestamp.isoformat()
         }
 
-    def fetch_recent_transactions(self, days: int = 30) -> List[Dict[str, Any]]:
+    async def fetch_recent_transactions(self, days: int = 30) -> List[Dict[str, Any]]:
         """
         Fetch recent transactions for the user.
         
@@ -293,12 +451,22 @@ class AgentTools:
         Returns:
             List of transaction dictionaries
         """
+        user_pk = await self._get_user_pk()
         cutoff = datetime.utcnow() - timedelta(days=days)
         
-        transactions = self.db.query(Transaction).filter(
-            Transaction.user_id == self.user.id,
-            Transaction.timestamp >= cutoff
-        ).order_by(Transaction.timestamp.desc()).all()
+        result = await self.db.execute(
+            select(
+                Transaction.id,
+                Transaction.amount,
+                Transaction.merchant,
+                Transaction.category,
+                Transaction.timestamp
+            ).where(
+                Transaction.user_id == user_pk,
+                Transaction.timestamp >= cutoff
+            ).order_by(Transaction.timestamp.desc())
+        )
+        transactions = result.all()
         
         return [
             {
@@ -311,46 +479,54 @@ class AgentTools:
             for t in transactions
         ]
     
-    def analyze_spending_pattern(self) -> Dict[str, Any]:
+    async def analyze_spending_pattern(self, active_goal: Optional[Union[Goal, Row]] = _UNSET) -> Dict[str, Any]:
         """
         Analyze the user's spending patterns this month.
         
+        Args:
+            active_goal: Active goal (object or row) if already loaded (None if the user has none)
+            
         Returns:
             Spending analysis dictionary
         """
-        # Get current month transactions
-        now = datetime.utcnow()
-        month_start = datetime(year=now.year, month=now.month, day=1)
+        user_pk = await self._get_user_pk()
+        
+        # Let the database total this month's transactions by category
+        result = await self.db.execute(self._monthly_spend_query(user_pk))
+        
+        # Get active goal for budget comparison
+        if active_goal is _UNSET:
+            active_goal = await self._get_goal()
         
-        transactions = self.db.query(Transaction).filter(
-            Transaction.user_id == self.user.id,
-            Transaction.timestamp >= month_start
-        ).all()
+        return self._summarize_spending(
+            ((r.category.value, r.is_essential, r.total, r.count) for r in result),
+            active_goal.month_nonessential_budget if active_goal else None
+        )
+    
+    def _summarize_spending(self, groups, budget: Optional[float]) -> Dict[str, Any]:
+        """
+        Build the spending analysis from grouped monthly totals.
         
-        # Calculate totals by category
+        Args:
+            groups: (category, is_essential, total, count) per group
+            budget: Monthly non-essential budget, if any
+            
+        Returns:
+            Spending analysis dictionary
+        """
         category_totals = {}
         total_nonessential = 0.0
+        transaction_count = 0
         
-        for tx in transactions:
-            category = tx.category.value
-            amount = tx.amount
-            
-            if category not in category_totals:
-                category_totals[category] = 0.0
-            category_totals[category] += amount
+        for category, is_essential, total, count in groups:
+            category_totals[category] = category_totals.get(category, 0.0) + total
+            transaction_count += count
             
             # Non-essential categories
             # If is_essential is False (default), it counts towards non-essential spending
-            if not tx.is_essential:
-                total_nonessential += amount
-        
-        # Get active goal for budget comparison
-        active_goal = self.db.query(Goal).filter(
-            Goal.user_id == self.user.id,
-            Goal.status == GoalStatus.ACTIVE
-        ).first()
+            if not is_essential:
+                total_nonessential += total
         
-        budget = active_goal.month_nonessential_budget if active_goal else None
         remaining_budget = (budget - total_nonessential) if budget else None
         
         return {
@@ -358,21 +534,21 @@ class AgentTools:
             "category_breakdown": category_totals,
             "month_nonessential_budget": budget,
             "remaining_budget": remaining_budget,
-            "transaction_count": len(transactions)
+            "transaction_count": transaction_count
         }
     
-    def check_budget_status(self) -> Dict[str, Any]:
+    async def check_budget_status(self, active_goal: Optional[Union[Goal, Row]] = _UNSET) -> Dict[str, Any]:
         """
         Check current budget status against goals.
         
+        Args:
+            active_goal: Active goal (object or row) if already loaded (None if the user has none)
+            
         Returns:
             Budget status dictionary with verdict
         """
-        spending = self.analyze_spending_pattern()
-        active_goal = self.db.query(Goal).filter(
-            Goal.user_id == self.user.id,
-            Goal.status == GoalStatus.ACTIVE
-        ).first()
+        if active_goal is _UNSET:
+            active_goal = await self._get_goal()
         
         if not active_goal:
             return {
@@ -380,10 +556,24 @@ class AgentTools:
                 "message": "No active goal set"
             }
         
+        spending = await self.analyze_spending_pattern(active_goal=active_goal)
+        return self._budget_status(self._goal_to_dict(active_goal), spending)
+    
+    def _budget_status(self, goal: Dict[str, Any], spending: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Compare this month's spending with the active goal's budget.
+        
+        Args:
+            goal: Active goal dictionary
+            spending: Spending analysis dictionary
+            
+        Returns:
+            Budget status dictionary with verdict
+        """
         total_spent = spending["total_nonessential"]
-        budget = active_goal.month_nonessential_budget or 0
+        budget = goal["month_nonessential_budget"] or 0
         remaining = budget - total_spent
-        saving_goal = active_goal.target_amount
+        saving_goal = goal["target_amount"]
         
         # Determine verdict
         if remaining >= saving_goal * settings.comfort_zone_threshold:
@@ -403,6 +593,6 @@ class AgentTools:
             "budget": budget,
             "remaining": remaining,
             "saving_goal": saving_goal,
-            "goal_title": active_goal.title
+            "goal_title": goal["title"]
         }
     
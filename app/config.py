@@ -29,6 +29,7 @@ class Settings(BaseSettings):
     telegram_chat_id: Optional[str] = None
     telegram_webhook_url: Optional[str] = None
     telegram_webhook_secret: Optional[str] = None
+    telegram_concurrent_updates: int = 16  # Updates handled in parallel
     
     # WhatsApp Business API
     whatsapp_access_token: Optional[str] = None
@@ -40,6 +41,17 @@ class Settings(BaseSettings):
     # Groq (NEW)
     groq_api_key: Optional[str] = None
     groq_model: str = "llama-3.1-8b-instant"
+    groq_batch_max_size: int = 8  # Requests dispatched together
+    groq_batch_max_wait_ms: int = 20  # Max time a request waits for a batch
+    history_message_max_chars: int = 512  # Per-message cap on history sent to the LLM
+
+    # Semantic response cache
+    semantic_cache_enabled: bool = True
+    semantic_cache_threshold: float = 0.92  # Minimum cosine similarity for a hit
+    semantic_cache_ttl: int = 900  # 15 minutes
+    embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    embedding_backend: str = "onnx"  # "onnx" (int8-quantized) or "sentence-transformers"
+    embedding_cache_dir: str = ".cache/embeddings"  # Exported ONNX models
 
     # (OPTIONAL) OpenAI fields left for compatibility
     openai_api_key: Optional[str] = None
@@ -72,6 +84,15 @@ class Settings(BaseSettings):
     @property
     def is_production(self) -> bool:
         return not self.debug
+    
+    @property
+    def async_database_url(self) -> str:
+        """Database URL using the asyncpg driver."""
+        url = self.database_url
+        for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+            if url.startswith(prefix):
+                return "postgresql+asyncpg://" + url[len(prefix):]
+        return url
 
 
 # Global settings instance
@@ -1,10 +1,11 @@
 """Database connection and session management."""
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from contextlib import contextmanager
-from typing import Generator
+from contextlib import contextmanager, asynccontextmanager
+from typing import Generator, AsyncGenerator
 
 from app.config import settings
 
@@ -24,6 +25,23 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+# Async engine for the agent and request handlers (asyncpg driver)
+async_engine = create_async_engine(
+    settings.async_database_url,
+    echo=settings.debug,
+    pool_pre_ping=True,
+    pool_size=5,
+    max_overflow=10
+)
+
+# Async session factory. Objects stay loaded after commit, since lazy
+# attribute refreshes are not possible outside an awaited call.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Base class for models
 Base = declarative_base()
 
@@ -44,6 +62,19 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for async FastAPI routes to get an async database session.
+    
+    Usage:
+        @app.get("/endpoint")
+        async def endpoint(db: AsyncSession = Depends(get_async_db)):
+            ...
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 @contextmanager
 def get_db_context():
     """
@@ -64,6 +95,24 @@ def get_db_context():
         db.close()
 
 
+@asynccontextmanager
+async def get_async_db_context():
+    """
+    Async context manager for database sessions outside of FastAPI.
+    
+    Usage:
+        async with get_async_db_context() as db:
+            result = await db.execute(select(User))
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+
 def init_db():
     """Initialize database tables."""
     from app.db import models  # Import models to register them
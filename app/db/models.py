@@ -4,7 +4,7 @@ from datetime import datetime
 from typing import Optional
 from sqlalchemy import (
     Column, Integer, String, Float, DateTime, 
-    ForeignKey, Boolean, Text, Enum as SQLEnum
+    ForeignKey, Boolean, Text, Index, Enum as SQLEnum, text
 )
 from sqlalchemy.orm import relationship
 import enum
@@ -71,6 +71,14 @@ class User(Base):
 class Goal(Base):
     """Financial goal model."""
     __tablename__ = "goals"
+    __table_args__ = (
+        # "First active goal" lookups; closed goals stay out of the index
+        Index(
+            "ix_goals_active_user",
+            "user_id", "id",
+            postgresql_where=text("status = 'ACTIVE'")
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -109,6 +117,15 @@ class Goal(Base):
 class Transaction(Base):
     """Transaction model."""
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Month-to-date spend aggregates per user; covering amount and
+        # is_essential lets the GROUP BY/SUM run as an index-only scan
+        Index(
+            "ix_transactions_user_timestamp_category",
+            "user_id", "timestamp", "category",
+            postgresql_include=["amount", "is_essential"]
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
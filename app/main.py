@@ -1,15 +1,24 @@
+import asyncio
+import orjson
 from fastapi import FastAPI, BackgroundTasks, Depends, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from datetime import datetime
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 from sqlalchemy.orm import Session
 
 # New imports
 from app.config import settings
+from app.utils import current_month_start
 from app.db.database import get_db, init_db
 from app.db.models import User, Goal, Transaction, GoalStatus, TransactionCategory
+from app.agents.mcp import get_groq_client, drain_history_writes
+from app.agents.semantic_cache import semantic_cache
 from app.messaging.telegram_bot import get_bot
-from app.messaging.telegram_notifier import send_telegram_text
+from app.messaging.telegram_notifier import (
+    send_telegram_text,
+    get_telegram_client,
+    close_telegram_client,
+)
 from app.messaging.whatsapp_bot import get_whatsapp_bot
 
 # Legacy imports for backward compatibility
@@ -47,17 +56,30 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             print(f"⚠️  Telegram bot initialization failed: {e}")
     
+    # Open the keep-alive client used for verdict notifications
+    get_telegram_client()
+    
+    # Warm up the shared Groq client and the semantic cache embedder
+    get_groq_client()
+    try:
+        await asyncio.to_thread(semantic_cache.warm_up)
+    except Exception as e:
+        print(f"⚠️  Embedding model warm-up failed: {e}")
+    
     yield
     
     # Shutdown
     print("👋 Shutting down Anya.fi...")
+    await drain_history_writes()
+    await close_telegram_client()
 
 
 app = FastAPI(
     title="Anya.fi – Financial Co-Pilot",
     description="Agentic AI for financial guidance on Telegram",
     version="2.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -130,7 +152,7 @@ async def whatsapp_webhook_handler(request: Request):
     
     Receives incoming WhatsApp messages and processes them.
     """
-    body = await request.json()
+    body = orjson.loads(await request.body())
     bot = get_whatsapp_bot()
     result = await bot.handle_webhook(body)
     return result
@@ -138,20 +160,22 @@ async def whatsapp_webhook_handler(request: Request):
 
 # ==================== LEGACY ENDPOINTS (Backward Compatibility) ====================
 
+NONESSENTIAL_CATEGORIES = frozenset({"shopping", "food", "entertainment"})
+
+
 def calc_month_nonessential_spend(user_id: str) -> float:
     """
     Calculate this month's total non-essential spend (shopping, food, entertainment)
     for the given user.
     """
     txs = legacy_get_user_transactions(user_id)
-    now = datetime.utcnow()
-    month_start = datetime(year=now.year, month=now.month, day=1)
+    month_start = current_month_start()
 
-    total = 0.0
-    for tx in txs:
-        if tx["timestamp"] >= month_start and tx["category"] in ("shopping", "food", "entertainment"):
-            total += float(tx["amount"])
-    return total
+    return sum(
+        float(tx["amount"])
+        for tx in txs
+        if tx["timestamp"] >= month_start and tx["category"] in NONESSENTIAL_CATEGORIES
+    )
 
 
 def evaluate_purchase(user: dict, tx: dict, month_spend_nonessential_before: float):
@@ -184,22 +208,29 @@ def evaluate_purchase(user: dict, tx: dict, month_spend_nonessential_before: flo
     return verdict, label, remaining_after
 
 
+VERDICT_EMOJI = {"GREEN": "🟢", "ORANGE": "🟠", "RED": "🔴"}
+
+VERDICT_MESSAGE_TEMPLATE = (
+    "{emoji} You just spent ₹{amount} on {merchant}.\n"
+    "This month you want to save ₹{month_goal}.\n"
+    "Based on your current spending, this purchase is {label}.\n\n"
+    "Approx. non-essential budget left this month after this: ₹{remaining:.0f}.\n"
+    "If you want, we can adjust something else to keep you on track. 💸"
+)
+
+
 def build_verdict_message(user: dict, tx: dict, verdict: str, label: str, remaining_after: float) -> str:
     """
     Create the text you will send on Telegram.
     """
-    emoji_map = {"GREEN": "🟢", "ORANGE": "🟠", "RED": "🔴"}
-    emoji = emoji_map.get(verdict, "⚪")
-
-    month_goal = user["month_saving_goal"]
-    text = (
-        f"{emoji} You just spent ₹{tx['amount']} on {tx['merchant']}.\n"
-        f"This month you want to save ₹{month_goal}.\n"
-        f"Based on your current spending, this purchase is {label}.\n\n"
-        f"Approx. non-essential budget left this month after this: ₹{max(remaining_after, 0):.0f}.\n"
-        "If you want, we can adjust something else to keep you on track. 💸"
+    return VERDICT_MESSAGE_TEMPLATE.format(
+        emoji=VERDICT_EMOJI.get(verdict, "⚪"),
+        amount=tx["amount"],
+        merchant=tx["merchant"],
+        month_goal=user["month_saving_goal"],
+        label=label,
+        remaining=max(remaining_after, 0),
     )
-    return text
 
 
 @app.post("/set-goal")
@@ -1,6 +1,6 @@
 """Redis-based session management for conversation context."""
 
-import json
+import orjson
 import redis
 from typing import Optional, Dict, Any
 from datetime import datetime
@@ -45,7 +45,7 @@ class SessionManager:
         if self.redis_client:
             data = self.redis_client.get(key)
             if data:
-                return json.loads(data)
+                return orjson.loads(data)
         else:
             # Fallback to in-memory
             return self._memory_store.get(key)
@@ -76,7 +76,7 @@ class SessionManager:
             self.redis_client.setex(
                 key,
                 ttl,
-                json.dumps(context)
+                orjson.dumps(context)
             )
         else:
             # Fallback to in-memory
@@ -165,6 +165,31 @@ class SessionManager:
         session['history'] = history
         self.set_session(user_id, session)
     
+    def add_turn_to_history(
+        self, 
+        user_id: str, 
+        user_message: str, 
+        assistant_message: str
+    ) -> None:
+        """
+        Add a user message and the assistant's reply to history in one update.
+        
+        Args:
+            user_id: Telegram user ID
+            user_message: User's message
+            assistant_message: Assistant's reply
+        """
+        session = self.get_session(user_id) or {}
+        history = session.get('history', [])
+        timestamp = datetime.utcnow().isoformat()
+        
+        history.append({'role': 'user', 'content': user_message, 'timestamp': timestamp})
+        history.append({'role': 'assistant', 'content': assistant_message, 'timestamp': timestamp})
+        
+        # Keep only last 20 messages to avoid memory bloat
+        session['history'] = history[-20:]
+        self.set_session(user_id, session)
+    
     def get_history(self, user_id: str, limit: int = 10) -> list:
         """
         Get conversation history for a user.
@@ -1,5 +1,6 @@
 """Telegram bot with conversational interface."""
 
+import asyncio
 import logging
 from typing import Optional
 from telegram import Update
@@ -12,8 +13,9 @@ from telegram.ext import (
 )
 
 from app.config import settings
-from app.db.database import get_db_context
-from app.agents.mcp import MCPAgent
+from app.db.database import get_async_db_context
+from app.agents.mcp import MCPAgent, get_groq_client, drain_history_writes
+from app.agents.semantic_cache import semantic_cache
 
 # Configure logging
 logging.basicConfig(
@@ -31,9 +33,29 @@ class TelegramBot:
         if not settings.telegram_bot_token:
             raise ValueError("TELEGRAM_BOT_TOKEN not configured")
         
-        self.application = Application.builder().token(settings.telegram_bot_token).build()
+        # Handle updates in parallel so concurrent users overlap (and batch) their LLM calls
+        self.application = (
+            Application.builder()
+            .token(settings.telegram_bot_token)
+            .concurrent_updates(settings.telegram_concurrent_updates)
+            .post_init(self._post_init)
+            .post_shutdown(self._post_shutdown)
+            .build()
+        )
         self._setup_handlers()
     
+    async def _post_init(self, application: Application):
+        """Warm up the shared Groq client and the semantic cache embedder."""
+        get_groq_client()
+        try:
+            await asyncio.to_thread(semantic_cache.warm_up)
+        except Exception as e:
+            logger.warning(f"⚠️  Embedding model warm-up failed: {e}")
+    
+    async def _post_shutdown(self, application: Application):
+        """Finish pending conversation history writes."""
+        await drain_history_writes()
+    
     def _setup_handlers(self):
         """Setup command and message handlers."""
         # Command handlers
@@ -85,14 +107,11 @@ class TelegramBot:
         """Handle /mystats command."""
         user_id = str(update.effective_user.id)
         
-        with get_db_context() as db:
+        async with get_async_db_context() as db:
             agent = MCPAgent(db, user_id)
             
-            # Get budget status
-            budget_status = agent.tools.check_budget_status()
-            
-            # Get active goals for progress info
-            goals = agent.tools.get_active_goals()
+            # Get active goals and budget status
+            goals, budget_status = await agent.tools.get_goals_overview()
             
             if budget_status["verdict"] == "NO_GOAL":
                 response = (
@@ -135,9 +154,9 @@ class TelegramBot:
         """Handle /goals command."""
         user_id = str(update.effective_user.id)
         
-        with get_db_context() as db:
+        async with get_async_db_context() as db:
             agent = MCPAgent(db, user_id)
-            goals = agent.tools.get_active_goals()
+            goals = await agent.tools.get_active_goals()
             
             if not goals:
                 response = (
@@ -174,9 +193,9 @@ class TelegramBot:
         await update.message.chat.send_action("typing")
         
         # Process message through MCP agent
-        with get_db_context() as db:
+        async with get_async_db_context() as db:
             agent = MCPAgent(db, user_id)
-            response = agent.process_message(user_message)
+            response = await agent.process_message(user_message)
         
         logger.info(f"Bot: {response}")
         
@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 import httpx
 from dotenv import load_dotenv
 
@@ -8,6 +9,27 @@ load_dotenv()
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 
+# Shared client so repeated sends reuse the TCP/TLS connection to Telegram
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_telegram_client() -> httpx.AsyncClient:
+    """Get or create the shared keep-alive HTTP client."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=100, keepalive_expiry=300)
+        )
+    return _client
+
+
+async def close_telegram_client():
+    """Close the shared HTTP client (call on shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
 
 async def send_telegram_text(text: str):
     """
@@ -26,11 +48,10 @@ async def send_telegram_text(text: str):
         "parse_mode": "HTML",
     }
 
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(url, json=payload)
-        try:
-            data = resp.json()
-        except Exception:
-            data = {"raw": resp.text}
-        print("Telegram API response:", data)
-        return data
+    resp = await get_telegram_client().post(url, json=payload)
+    try:
+        data = resp.json()
+    except Exception:
+        data = {"raw": resp.text}
+    print("Telegram API response:", data)
+    return data
@@ -7,7 +7,7 @@ import hmac
 import hashlib
 
 from app.config import settings
-from app.db.database import get_db_context
+from app.db.database import get_async_db_context
 from app.agents.mcp import MCPAgent
 from app.messaging.whatsapp_client import get_whatsapp_client
 from app.messaging.session_manager import session_manager
@@ -111,11 +111,11 @@ class WhatsAppBot:
             return
         
         # Process through MCP agent
-        with get_db_context() as db:
+        async with get_async_db_context() as db:
             # Use phone number as user_id for WhatsApp
             user_id = f"wa_{from_number}"
             agent = MCPAgent(db, user_id)
-            response = agent.process_message(text)
+            response = await agent.process_message(text)
         
         logger.info(f"Bot response: {response}")
         
@@ -172,13 +172,11 @@ class WhatsAppBot:
     
     async def _send_stats(self, from_number: str):
         """Send budget statistics."""
-        with get_db_context() as db:
+        async with get_async_db_context() as db:
             user_id = f"wa_{from_number}"
             agent = MCPAgent(db, user_id)
-            budget_status = agent.tools.check_budget_status()
-            
-            # Get active goals for progress info
-            goals = agent.tools.get_active_goals()
+            # Get active goals and budget status
+            goals, budget_status = await agent.tools.get_goals_overview()
             
             if budget_status["verdict"] == "NO_GOAL":
                 response = (
@@ -219,10 +217,10 @@ class WhatsAppBot:
     
     async def _send_goals(self, from_number: str):
         """Send active goals."""
-        with get_db_context() as db:
+        async with get_async_db_context() as db:
             user_id = f"wa_{from_number}"
             agent = MCPAgent(db, user_id)
-            goals = agent.tools.get_active_goals()
+            goals = await agent.tools.get_active_goals()
             
             if not goals:
                 response = (
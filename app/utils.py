@@ -0,0 +1,21 @@
+"""Shared helpers."""
+
+from datetime import datetime
+from typing import Any, Dict
+
+# Start of the current month, rebuilt only when the month rolls over
+_MONTH_CACHE: Dict[str, Any] = {"key": None, "start": None}
+
+
+def current_month_start() -> datetime:
+    """
+    Get the start of the current month (UTC, naive like the stored timestamps).
+    
+    Returns:
+        Midnight on the first day of this month
+    """
+    now = datetime.utcnow()
+    key = (now.year, now.month)
+    if _MONTH_CACHE["key"] != key:
+        _MONTH_CACHE.update(key=key, start=datetime(year=now.year, month=now.month, day=1))
+    return _MONTH_CACHE["start"]
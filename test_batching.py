@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Test script to verify the Groq batcher routes results to the right callers."""
+
+import sys
+import os
+import asyncio
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.agents.batching import GroqBatcher
+
+class FakeGroqClient:
+    """Stands in for AsyncGroq: echoes the request tag or raises on request."""
+
+    def __init__(self):
+        self.chat = self
+        self.completions = self
+        self.calls = 0
+
+    async def create(self, tag, delay=0.0, fail=False, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError(f"failed {tag}")
+        return f"response {tag}"
+
+async def test_batching():
+    """Test result and exception routing through the batcher."""
+
+    print("=" * 60)
+    print("Testing Groq Batcher")
+    print("=" * 60)
+
+    client = FakeGroqClient()
+    batcher = GroqBatcher(max_batch=4, max_wait=0.5)
+
+    # Test 1: A lone request is sent without waiting out the window
+    print("\n🚀 Test 1: Lone request...")
+    start = time.monotonic()
+    result = await batcher.submit(client, tag=0)
+    elapsed = time.monotonic() - start
+    print(f"   {result} in {elapsed * 1000:.0f}ms")
+    assert result == "response 0", f"Unexpected result: {result}"
+    assert elapsed < batcher.max_wait, "Lone request should not wait for companions"
+    print("   ✅ PASSED")
+
+    # Test 2: Concurrent requests each get their own result, even out of order
+    print("\n📦 Test 2: Concurrent requests...")
+    tags = list(range(1, 10))
+    results = await asyncio.gather(*[
+        batcher.submit(client, tag=tag, delay=0.01 * (10 - tag)) for tag in tags
+    ])
+    assert results == [f"response {tag}" for tag in tags], f"Results routed wrongly: {results}"
+    print("   ✅ PASSED")
+
+    # Test 3: Exceptions reach only the caller whose request failed
+    print("\n💥 Test 3: Exceptions...")
+    results = await asyncio.gather(
+        batcher.submit(client, tag="ok-1"),
+        batcher.submit(client, tag="bad", fail=True),
+        batcher.submit(client, tag="ok-2"),
+        return_exceptions=True
+    )
+    assert results[0] == "response ok-1", f"Unexpected result: {results[0]}"
+    assert isinstance(results[1], RuntimeError) and str(results[1]) == "failed bad", f"Unexpected error: {results[1]}"
+    assert results[2] == "response ok-2", f"Unexpected result: {results[2]}"
+    print("   ✅ PASSED")
+
+    # Test 4: A cancelled caller doesn't break the rest of its batch
+    print("\n🚪 Test 4: Cancelled caller...")
+    gone = asyncio.ensure_future(batcher.submit(client, tag="gone", delay=0.05))
+    stays = asyncio.ensure_future(batcher.submit(client, tag="stays", delay=0.05))
+    await asyncio.sleep(0.01)
+    gone.cancel()
+    assert await stays == "response stays", "Remaining caller should still get its response"
+    print("   ✅ PASSED")
+
+    print("\n" + "=" * 60)
+    print("Test Complete!")
+    print("=" * 60)
+
+if __name__ == "__main__":
+    asyncio.run(test_batching())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Test script to verify LLM context formatting and quantization."""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.agents.mcp import MCPAgent
+
+def make_context(current: float, progress: float, spent: float, remaining: float) -> dict:
+    """Build an observed context with one goal and a budget status."""
+    return {
+        "goals": [{
+            "title": "Laptop",
+            "current_amount": current,
+            "target_amount": 80000,
+            "progress_percentage": progress,
+        }],
+        "budget_status": {
+            "verdict": "ORANGE",
+            "label": "borderline",
+            "total_spent": spent,
+            "budget": 5000,
+            "remaining": remaining,
+        },
+    }
+
+def test_context_format():
+    """Test rendering and quantization of the context block."""
+
+    print("=" * 60)
+    print("Testing Context Formatting")
+    print("=" * 60)
+
+    agent = MCPAgent(None, "test_context_user")
+
+    # Test 1: Amounts round to ₹50 and percentages to 5%
+    print("\n🧮 Test 1: Quantized rendering...")
+    context_str = agent._format_context(make_context(1234, 12.6, 2980, 2020))
+    print("   " + context_str.replace("\n", "\n   "))
+    expected = (
+        "Active Goals:\n"
+        "- Laptop: ₹1250 / ₹80000 (15%)\n\n\n"
+        "Budget Status: ORANGE (borderline)\n"
+        "Spent: ₹3000 / ₹5000\n"
+        "Remaining: ₹2000"
+    )
+    assert context_str == expected, f"Unexpected context:\n{context_str}"
+    print("   ✅ PASSED")
+
+    # Test 2: Small drift keeps the prompt identical, a real change doesn't
+    print("\n🎯 Test 2: Stability under small changes...")
+    drifted = agent._format_context(make_context(1240, 13.4, 2995, 2005))
+    assert drifted == context_str, "Small drift should render the same context"
+    changed = agent._format_context(make_context(1300, 16, 3100, 1900))
+    assert changed != context_str, "A real change should render a different context"
+    print("   ✅ PASSED")
+
+    # Test 3: No goal, no budget block
+    print("\n📭 Test 3: No active goals...")
+    empty = agent._format_context({
+        "goals": [],
+        "budget_status": {"verdict": "NO_GOAL", "message": "No active goal set"},
+    })
+    assert empty == "No active goals set.", f"Unexpected context: {empty!r}"
+    print("   ✅ PASSED")
+
+    print("\n" + "=" * 60)
+    print("Test Complete!")
+    print("=" * 60)
+
+if __name__ == "__main__":
+    test_context_format()
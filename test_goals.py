@@ -3,15 +3,19 @@
 
 import sys
 import os
+import asyncio
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.db.database import get_db_context
-from app.agents.mcp import MCPAgent
+from sqlalchemy import select
+
+from app.db.database import get_async_db_context
+from app.agents.mcp import MCPAgent, drain_history_writes
+from app.agents.tools import forget_user
 from app.db.models import User, Goal
 
-def test_goal_creation():
+async def test_goal_creation():
     """Test creating and retrieving goals."""
     
     # Test with a WhatsApp user ID
@@ -21,13 +25,15 @@ def test_goal_creation():
     print("Testing Goal Creation and Retrieval")
     print("=" * 60)
     
-    with get_db_context() as db:
+    async with get_async_db_context() as db:
         # Clean up any existing test user
-        existing_user = db.query(User).filter(User.telegram_id == test_user_id).first()
+        result = await db.execute(select(User).where(User.telegram_id == test_user_id))
+        existing_user = result.scalars().first()
         if existing_user:
             print(f"\n🧹 Cleaning up existing test user: {existing_user.id}")
-            db.delete(existing_user)
-            db.commit()
+            await db.delete(existing_user)
+            await db.commit()
+            forget_user(test_user_id)
         
         # Create agent
         print(f"\n📱 Creating agent for user: {test_user_id}")
@@ -35,7 +41,7 @@ def test_goal_creation():
         
         # Test 1: Check goals before creation
         print("\n📊 Test 1: Checking goals before creation...")
-        goals_before = agent.tools.get_active_goals()
+        goals_before = await agent.tools.get_active_goals()
         print(f"   Active goals: {len(goals_before)}")
         assert len(goals_before) == 0, "Should have no goals initially"
         print("   ✅ PASSED")
@@ -44,12 +50,12 @@ def test_goal_creation():
         print("\n💬 Test 2: Processing message to create goal...")
         test_message = "I want to save ₹50000 for a laptop in 3 months"
         print(f"   Message: '{test_message}'")
-        response = agent.process_message(test_message)
+        response = await agent.process_message(test_message)
         print(f"   Response: {response[:100]}...")
         
         # Test 3: Check if goal was created
         print("\n📊 Test 3: Checking if goal was created...")
-        goals_after = agent.tools.get_active_goals()
+        goals_after = await agent.tools.get_active_goals()
         print(f"   Active goals: {len(goals_after)}")
         
         if len(goals_after) > 0:
@@ -66,17 +72,19 @@ def test_goal_creation():
             print("   ❌ FAILED - No goal created")
             print("\n   Debugging info:")
             # Check if user was created
-            user = db.query(User).filter(User.telegram_id == test_user_id).first()
+            result = await db.execute(select(User).where(User.telegram_id == test_user_id))
+            user = result.scalars().first()
             print(f"   - User exists: {user is not None}")
             if user:
                 print(f"   - User ID: {user.id}")
                 # Check goals directly
-                all_goals = db.query(Goal).filter(Goal.user_id == user.id).all()
+                result = await db.execute(select(Goal).where(Goal.user_id == user.id))
+                all_goals = result.scalars().all()
                 print(f"   - Total goals in DB: {len(all_goals)}")
         
         # Test 4: Test /goals command
         print("\n📊 Test 4: Testing /goals command simulation...")
-        goals_list = agent.tools.get_active_goals()
+        goals_list = await agent.tools.get_active_goals()
         if goals_list:
             print(f"   ✅ Can retrieve {len(goals_list)} goal(s)")
             for i, g in enumerate(goals_list, 1):
@@ -84,9 +92,11 @@ def test_goal_creation():
         else:
             print("   ⚠️  No goals to display")
     
+    await drain_history_writes()
+    
     print("\n" + "=" * 60)
     print("Test Complete!")
     print("=" * 60)
 
 if __name__ == "__main__":
-    test_goal_creation()
+    asyncio.run(test_goal_creation())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Test script to verify semantic cache store, lookup and expiry (no model needed)."""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.agents import semantic_cache as cache_module
+from app.agents.semantic_cache import SemanticCache, NO_CACHE_INTENTS
+
+def unit(*values) -> np.ndarray:
+    """Build a normalized fake embedding."""
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+def reply(intent: str = "general_chat", text: str = "Hi!") -> dict:
+    """Build a reasoning result."""
+    return {"intent": intent, "response": text, "actions": []}
+
+def test_semantic_cache():
+    """Test the cache with hand-made unit vectors."""
+
+    user_id = "test_cache_user"
+    context = "No active goals set."
+    history = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "Hello!"}]
+
+    print("=" * 60)
+    print("Testing Semantic Cache")
+    print("=" * 60)
+
+    cache = SemanticCache()
+    cache.threshold = 0.9
+
+    # Test 1: Similar message hits, dissimilar misses
+    print("\n🔍 Test 1: Store and lookup...")
+    cache.store(user_id, context, history, unit(1, 0, 0), reply(text="Cached"))
+    hit = cache.lookup(user_id, context, history, unit(1, 0.1, 0))
+    assert hit and hit["response"] == "Cached", "Similar message should hit"
+    assert cache.lookup(user_id, context, history, unit(0, 1, 0)) is None, "Dissimilar message should miss"
+    hit["response"] = "mutated"
+    assert cache.lookup(user_id, context, history, unit(1, 0, 0))["response"] == "Cached", "Hits should be copies"
+    print("   ✅ PASSED")
+
+    # Test 2: Context and previous reply are part of the key
+    print("\n🧭 Test 2: Context and history scoping...")
+    assert cache.lookup(user_id, "Active Goals:\n- Laptop", history, unit(1, 0, 0)) is None, "Other context should miss"
+    other_history = history[:-1] + [{"role": "assistant", "content": "Want to set a goal?"}]
+    assert cache.lookup(user_id, context, other_history, unit(1, 0, 0)) is None, "Other previous reply should miss"
+    assert cache.lookup("someone_else", context, history, unit(1, 0, 0)) is None, "Other user should miss"
+    print("   ✅ PASSED")
+
+    # Test 3: Write intents are never cached
+    print("\n✍️  Test 3: NO_CACHE_INTENTS...")
+    for intent in NO_CACHE_INTENTS:
+        cache.store("writer", context, history, unit(0, 0, 1), reply(intent=intent))
+    assert cache.lookup("writer", context, history, unit(0, 0, 1)) is None, "Write intents should not be stored"
+    assert "writer" not in cache._entries, "No namespace should be kept for write intents"
+    print("   ✅ PASSED")
+
+    # Test 4: Expired entries miss and their namespace is dropped
+    print("\n⏱️  Test 4: TTL...")
+    cache.ttl = -1
+    cache.store("expired", context, history, unit(1, 0, 0), reply())
+    assert cache.lookup("expired", context, history, unit(1, 0, 0)) is None, "Expired entry should miss"
+    assert "expired" not in cache._entries, "Expired namespace should be dropped"
+    cache.ttl = 900
+    print("   ✅ PASSED")
+
+    # Test 5: invalidate() drops the user's entries
+    print("\n🧹 Test 5: invalidate...")
+    cache.invalidate(user_id)
+    assert cache.lookup(user_id, context, history, unit(1, 0, 0)) is None, "Invalidated entry should miss"
+    print("   ✅ PASSED")
+
+    # Test 6: Number of cached users is capped
+    print("\n📦 Test 6: User cap...")
+    for i in range(cache_module.MAX_CACHED_USERS + 5):
+        cache.store(f"user_{i}", context, history, unit(1, 0, 0), reply())
+    assert len(cache._entries) == cache_module.MAX_CACHED_USERS, "Cache should hold at most MAX_CACHED_USERS"
+    assert "user_0" not in cache._entries, "Oldest user should be evicted first"
+    print("   ✅ PASSED")
+
+    print("\n" + "=" * 60)
+    print("Test Complete!")
+    print("=" * 60)
+
+if __name__ == "__main__":
+    test_semantic_cache()